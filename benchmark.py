@@ -0,0 +1,287 @@
+# Benchmark dei motori di ottimizzazione su cataloghi sintetici, senza accesso a Google Sheets.
+#
+# Ogni motore (PT.3, PT.6, PT.9 e le modalità di vv_4.PY) viene eseguito in un processo separato su una griglia
+# prodotti x distributori; per ogni esecuzione si registrano tempo, picco di memoria (RSS), combinazioni al secondo
+# e accordo del costo con il riferimento. Il report JSON/CSV può essere confrontato con quello di un'esecuzione precedente.
+
+import argparse
+import csv
+import importlib
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import psutil
+import queue as queue_module
+import random
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Motori confrontati: script e numero massimo di combinazioni (None = nessun limite)
+ENGINES = {
+    'pt3_gray_sequenziale': ('INTEGRAZIONE PT.3.PY', 200000),
+    'pt6_pool_intervalli': ('INTEGRAZIONE PT.6.PY', 200000),
+    'pt9_branch_and_bound': ('INTEGRAZIONE PT.9.PY', None),
+    'vv4_sequenziale': ('vv_4.PY', 200000),
+    'vv4_vettoriale': ('vv_4.PY', 20000000),
+    'vv4_gray': ('vv_4.PY', 5000000),
+    'vv4_milp': ('vv_4.PY', None),
+    'vv4_anytime': ('vv_4.PY', None),
+}
+
+# Motori usati come riferimento per l'accordo dei risultati, in ordine di preferenza: solo enumerazioni complete di vv_4.PY.
+# Il MILP è uno dei motori verificati; se nessuna enumerazione è stata eseguita (griglie grandi) l'accordo resta vuoto
+REFERENCE_ENGINES = ['vv4_sequenziale', 'vv4_vettoriale', 'vv4_gray']
+
+# Motori che enumerano tutto lo spazio delle combinazioni: solo per questi le combinazioni al secondo hanno senso
+# (branch and bound, MILP e anytime non visitano ogni combinazione, anytime dura sempre ANYTIME_TIME_BUDGET)
+ENUMERATION_ENGINES = {'pt3_gray_sequenziale', 'pt6_pool_intervalli', 'vv4_sequenziale', 'vv4_vettoriale', 'vv4_gray'}
+
+ANYTIME_TIME_BUDGET = 2
+
+# Tempo massimo (secondi) di un motore su una dimensione della griglia
+ENGINE_TIMEOUT = 600
+
+def get_module_name(filename):
+    return 'bench_' + ''.join(c if c.isalnum() else '_' for c in filename)
+
+SCRIPT_MODULES = {get_module_name(filename): filename for filename, _ in ENGINES.values()}
+
+# Rende importabili gli script (estensione .PY, nomi con spazi) come moduli 'bench_*'. Il finder è installato all'import
+# di questo file, quindi anche nei worker avviati con 'spawn', che devono ritrovare le funzioni di quei moduli
+class ScriptFinder(importlib.abc.MetaPathFinder):
+    def find_spec(self, fullname, path, target=None):
+        if fullname not in SCRIPT_MODULES:
+            return None
+        loader = importlib.machinery.SourceFileLoader(fullname, os.path.join(REPO_DIR, SCRIPT_MODULES[fullname]))
+        return importlib.util.spec_from_loader(fullname, loader)
+
+sys.meta_path.append(ScriptFinder())
+
+def load_script(filename):
+    return importlib.import_module(get_module_name(filename))
+
+def format_decimal(value):
+    return f"{value:.2f}".replace('.', ',')
+
+# Genera i valori grezzi dei fogli (SETTINGS, CONDIZIONI, fogli distributore) come li restituisce Google Sheets
+def generate_sheet_values(product_count, distributor_count, seed):
+    rng = random.Random(f"{seed}-{product_count}-{distributor_count}")
+    distributors = [f"DISTRIBUTORE {d + 1}" for d in range(distributor_count)]
+    product_ids = [f"PRD{p:04d}" for p in range(product_count)]
+
+    values = {
+        'SETTINGS': [['Foglio', 'Estrai']] + [[distributor, 'TRUE'] for distributor in distributors] + [['ARCHIVIO', 'FALSE']],
+        'CONDIZIONI': [['Distributore', 'Peso (kg)', 'Totale imponibile (€)', 'Spedizione (€ + IVA)', 'Costo Imballaggio (€ + IVA)']],
+    }
+    for d, distributor in enumerate(distributors):
+        rows = [[distributor], [], [], ['ID', 'Descrizione', 'Importo', 'Iva', 'Peso tot']]
+        for p, product_id in enumerate(product_ids):
+            # Ogni prodotto è disponibile almeno presso un distributore
+            if p % distributor_count != d and rng.random() < 0.2:
+                continue
+            weight = 'N/A' if rng.random() < 0.1 else format_decimal(rng.uniform(0.1, 6))
+            rows.append([product_id, f"Articolo {p}", format_decimal(rng.uniform(2, 80)) + ' €', f"{rng.choice([4, 10, 22])}%", weight])
+        values[distributor] = rows
+
+        weight_threshold = format_decimal(rng.choice([2, 3, 5, 10]))
+        amount_threshold = format_decimal(rng.choice([30, 50, 100, 150]))
+        values['CONDIZIONI'] += [
+            [distributor, f"<{weight_threshold}", f"<{amount_threshold}", format_decimal(rng.uniform(4, 12)), format_decimal(rng.uniform(0, 3))],
+            [distributor, f">{weight_threshold}", f"<{amount_threshold}", format_decimal(rng.uniform(8, 20)), 'N/A'],
+            [distributor, f"<{weight_threshold}", f">{amount_threshold}", '0,00', format_decimal(rng.uniform(0, 2))],
+            [distributor, f">{weight_threshold}", f">{amount_threshold}", format_decimal(rng.uniform(2, 8)), format_decimal(rng.uniform(0, 2))],
+            [distributor, 'N/A', f">{amount_threshold}", format_decimal(rng.uniform(10, 20)), 'N/A'],
+        ]
+    values['ARCHIVIO'] = [['']]
+    return values
+
+def generate_workload(product_count, distributor_count, seed):
+    vv4 = load_script('vv_4.PY')
+    extracted_data, conditions_data = vv4.parse_sheet_values(generate_sheet_values(product_count, distributor_count, seed))
+    product_data_index = {
+        distributor: {product['ID']: product for product in products}
+        for distributor, products in extracted_data.items()
+    }
+    return extracted_data, conditions_data, product_data_index
+
+def count_combinations(extracted_data):
+    product_ids = {product['ID'] for products in extracted_data.values() for product in products}
+    total_combinations = 1
+    for product_id in product_ids:
+        total_combinations *= sum(1 for products in extracted_data.values() if any(product['ID'] == product_id for product in products))
+    return total_combinations
+
+def run_engine(engine, extracted_data, conditions_data, product_data_index):
+    if engine == 'pt3_gray_sequenziale':
+        return load_script('INTEGRAZIONE PT.3.PY').find_optimal_combination(extracted_data, conditions_data)
+    if engine == 'pt6_pool_intervalli':
+        return load_script('INTEGRAZIONE PT.6.PY').find_optimal_combination(product_data_index, conditions_data)
+    if engine == 'pt9_branch_and_bound':
+        return load_script('INTEGRAZIONE PT.9.PY').find_optimal_combination(product_data_index, conditions_data)
+
+    vv4 = load_script('vv_4.PY')
+    if engine == 'vv4_sequenziale':
+        return vv4.find_optimal_combination_sequential(extracted_data, conditions_data)
+    if engine == 'vv4_vettoriale':
+        return vv4.find_optimal_combination_sharded(extracted_data, conditions_data)
+    if engine == 'vv4_gray':
+        return vv4.find_optimal_combination_sharded(extracted_data, conditions_data, enumeration='gray')
+    if engine == 'vv4_milp':
+        return vv4.find_optimal_combination_milp(extracted_data, conditions_data)
+    if engine == 'vv4_anytime':
+        optimal_combination, min_cost, _ = vv4.find_optimal_combination_anytime(extracted_data, conditions_data, ANYTIME_TIME_BUDGET)
+        return optimal_combination, min_cost
+    raise ValueError(f"Motore sconosciuto: {engine}")
+
+# Picco di memoria in MB (ru_maxrss è in KB su Linux, in byte su macOS)
+def get_peak_rss_mb(who):
+    peak_rss = resource.getrusage(who).ru_maxrss
+    return peak_rss / (1024 ** 2) if sys.platform == 'darwin' else peak_rss / 1024
+
+# Esecuzione nel processo figlio: il picco di memoria misurato riguarda solo questo motore (e i suoi worker)
+def measure_engine(engine, product_count, distributor_count, seed, queue):
+    logging.disable(logging.INFO)
+    sys.stdout = sys.stderr = open(os.devnull, 'w')
+    try:
+        extracted_data, conditions_data, product_data_index = generate_workload(product_count, distributor_count, seed)
+        start_time = time.perf_counter()
+        _, min_cost = run_engine(engine, extracted_data, conditions_data, product_data_index)
+        wall_time = time.perf_counter() - start_time
+        peak_rss_mb = max(get_peak_rss_mb(resource.RUSAGE_SELF), get_peak_rss_mb(resource.RUSAGE_CHILDREN))
+        queue.put({'status': 'ok', 'min_cost': min_cost, 'wall_time_s': wall_time, 'peak_rss_mb': peak_rss_mb})
+    except Exception as e:
+        queue.put({'status': 'errore', 'error': f"{type(e).__name__}: {e}"})
+
+# Attende il risultato del processo figlio senza bloccarsi se il processo termina senza risultato (es. OOM) o supera il tempo massimo
+def wait_for_result(process, queue, timeout):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return queue.get(timeout=1)
+        except queue_module.Empty:
+            pass
+        if not process.is_alive():
+            try:
+                return queue.get(timeout=1)
+            except queue_module.Empty:
+                return {'status': 'errore', 'error': f"Processo terminato senza risultato (exit code {process.exitcode})"}
+        if time.monotonic() > deadline:
+            # Termina anche i worker del pool del motore, che altrimenti resterebbero orfani
+            for child in psutil.Process(process.pid).children(recursive=True):
+                child.kill()
+            process.terminate()
+            return {'status': 'errore', 'error': f"Tempo massimo di {timeout}s superato"}
+
+def run_benchmark(product_counts, distributor_counts, engines, seed, timeout=ENGINE_TIMEOUT):
+    context = multiprocessing.get_context('spawn')
+    records = []
+    for product_count in product_counts:
+        for distributor_count in distributor_counts:
+            # Come in measure_engine: i log di caricamento dei cataloghi sintetici coprirebbero le righe del report
+            logging.disable(logging.INFO)
+            try:
+                extracted_data, _, _ = generate_workload(product_count, distributor_count, seed)
+            finally:
+                logging.disable(logging.NOTSET)
+            total_combinations = count_combinations(extracted_data)
+
+            grid_records = []
+            for engine in engines:
+                record = {'engine': engine, 'products': product_count, 'distributors': distributor_count, 'combinations': total_combinations}
+                max_combinations = ENGINES[engine][1]
+                if max_combinations is not None and total_combinations > max_combinations:
+                    record['status'] = 'saltato'
+                else:
+                    queue = context.Queue()
+                    process = context.Process(target=measure_engine, args=(engine, product_count, distributor_count, seed, queue))
+                    process.start()
+                    record.update(wait_for_result(process, queue, timeout))
+                    process.join()
+                    if record['status'] == 'ok' and engine in ENUMERATION_ENGINES:
+                        record['combinations_per_s'] = total_combinations / record['wall_time_s'] if record['wall_time_s'] else None
+                logging.info(f"{engine} {product_count}x{distributor_count}: {record}")
+                grid_records.append(record)
+
+            # Accordo con la prima enumerazione completa disponibile per questa dimensione
+            reference_cost = next((r['min_cost'] for name in REFERENCE_ENGINES for r in grid_records if r['engine'] == name and r['status'] == 'ok'), None)
+            for record in grid_records:
+                if record['status'] == 'ok' and reference_cost is not None:
+                    record['reference_cost'] = reference_cost
+                    record['agrees'] = abs(record['min_cost'] - reference_cost) <= 1e-6
+            records += grid_records
+    return records
+
+REPORT_FIELDS = ['engine', 'products', 'distributors', 'combinations', 'status', 'wall_time_s', 'peak_rss_mb', 'combinations_per_s', 'min_cost', 'reference_cost', 'agrees', 'error']
+
+def write_report(records, metadata, report_path):
+    with open(f"{report_path}.json", 'w', encoding='utf-8') as f:
+        json.dump({'metadata': metadata, 'results': records}, f, ensure_ascii=False, indent=1)
+    with open(f"{report_path}.csv", 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(records)
+    logging.info(f"Report scritto in {report_path}.json e {report_path}.csv")
+
+# Confronto con un report precedente: rapporto dei tempi e cambi di accordo per ogni (motore, prodotti, distributori)
+def compare_with_baseline(records, baseline_path, slowdown_threshold=1.2):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['engine'], r['products'], r['distributors']): r for r in json.load(f)['results']}
+
+    regressions = 0
+    for record in records:
+        previous = baseline.get((record['engine'], record['products'], record['distributors']))
+        if not previous or record['status'] != 'ok' or previous['status'] != 'ok':
+            continue
+        ratio = record['wall_time_s'] / previous['wall_time_s'] if previous['wall_time_s'] else float('inf')
+        label = f"{record['engine']} {record['products']}x{record['distributors']}"
+        if ratio > slowdown_threshold:
+            regressions += 1
+            logging.warning(f"{label}: {ratio:.2f}x più lento ({previous['wall_time_s']:.3f}s -> {record['wall_time_s']:.3f}s)")
+        else:
+            logging.info(f"{label}: {ratio:.2f}x rispetto al riferimento")
+        if previous.get('agrees') and not record.get('agrees', True):
+            regressions += 1
+            logging.warning(f"{label}: il costo non coincide più con il riferimento ({record['min_cost']} invece di {record['reference_cost']})")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dei motori di ottimizzazione su dati sintetici")
+    parser.add_argument('--products', type=int, nargs='+', default=[4, 6, 8, 10])
+    parser.add_argument('--distributors', type=int, nargs='+', default=[2, 3, 4])
+    parser.add_argument('--engines', nargs='+', choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--report', default='benchmark_report', help="Percorso del report senza estensione (.json e .csv)")
+    parser.add_argument('--baseline', help="Report JSON di un'esecuzione precedente da confrontare")
+    parser.add_argument('--timeout', type=float, default=ENGINE_TIMEOUT, help="Secondi massimi per ogni esecuzione di un motore")
+    parser.add_argument('--export-source', help="Salva il carico di lavoro (prima dimensione della griglia) come file per vv_4.PY --source")
+    args = parser.parse_args()
+
+    if args.export_source:
+        load_script('vv_4.PY').save_local_spreadsheet(generate_sheet_values(args.products[0], args.distributors[0], args.seed), args.export_source)
+
+    metadata = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'seed': args.seed,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': multiprocessing.cpu_count(),
+    }
+    records = run_benchmark(args.products, args.distributors, args.engines, args.seed, args.timeout)
+    write_report(records, metadata, args.report)
+
+    disagreements = [r for r in records if r.get('agrees') is False and r['engine'] != 'vv4_anytime']
+    for record in disagreements:
+        logging.error(f"Risultato diverso dal riferimento: {record['engine']} {record['products']}x{record['distributors']} ({record['min_cost']} invece di {record['reference_cost']})")
+    regressions = compare_with_baseline(records, args.baseline) if args.baseline else 0
+    sys.exit(1 if disagreements or regressions else 0)
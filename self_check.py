@@ -0,0 +1,198 @@
+# Verifiche offline di vv_4.PY, senza accesso a Google Sheets.
+#
+# Confronta i motori di ottimizzazione con le funzioni di riferimento (calculate_total_cost e la forza bruta sequenziale)
+# su cataloghi sintetici, anche con soglie delle CONDIZIONI posizionate esattamente su totali raggiungibili, e controlla
+# la scrittura dei risultati nel foglio 'COMBINAZIONE' su un foglio di calcolo locale (LocalSpreadsheetSource).
+# Termina con codice 1 se una verifica fallisce.
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import random
+import sys
+import tempfile
+
+from benchmark import generate_sheet_values, load_script, format_decimal
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Catalogo con soglie su totali raggiungibili: ogni soglia è la somma esatta (in centesimi) di alcuni prezzi o pesi del
+# distributore, con le fasce '<soglia' e '>soglia - 0,01' come nei listini reali
+def generate_boundary_sheet_values(product_count, distributor_count, seed):
+    rng = random.Random(f"confine-{seed}-{product_count}-{distributor_count}")
+    distributors = [f"DISTRIBUTORE {d + 1}" for d in range(distributor_count)]
+
+    values = {
+        'SETTINGS': [['Foglio', 'Estrai']] + [[distributor, 'TRUE'] for distributor in distributors],
+        'CONDIZIONI': [['Distributore', 'Peso (kg)', 'Totale imponibile (€)', 'Spedizione (€ + IVA)', 'Costo Imballaggio (€ + IVA)']],
+    }
+    for d, distributor in enumerate(distributors):
+        rows = [[distributor], [], [], ['ID', 'Descrizione', 'Importo', 'Iva', 'Peso tot']]
+        prices, weights = [], []
+        for p in range(product_count):
+            if p % distributor_count != d and rng.random() < 0.2:
+                continue
+            price_cents, weight_cents = rng.randint(100, 3000), rng.randint(10, 300)
+            prices.append(price_cents)
+            weights.append(weight_cents)
+            rows.append([f"PRD{p:04d}", f"Articolo {p}", format_decimal(price_cents / 100) + ' €', f"{rng.choice([4, 10, 22])}%", format_decimal(weight_cents / 100)])
+        values[distributor] = rows
+
+        # Fasce di imponibile: spedizione decrescente fino alla gratuità sopra l'ultima soglia
+        amount_thresholds = sorted({sum(rng.sample(prices, min(len(prices), rng.randint(3, 7)))) for _ in range(6)})
+        for i, amount_cents in enumerate(amount_thresholds):
+            values['CONDIZIONI'].append([distributor, '<1000,00', f"<{format_decimal(amount_cents / 100)}", format_decimal(15 * (len(amount_thresholds) - i) + rng.randint(0, 5)), 'N/A'])
+        values['CONDIZIONI'].append([distributor, '<1000,00', f">{format_decimal((amount_thresholds[-1] - 1) / 100)}", '0,00', 'N/A'])
+
+        # Fasce di peso: imballaggio diverso sotto e sopra la soglia
+        weight_cents = sum(rng.sample(weights, min(len(weights), rng.randint(2, 6))))
+        values['CONDIZIONI'] += [
+            [distributor, f"<{format_decimal(weight_cents / 100)}", '>0,00', 'N/A', format_decimal(rng.randint(0, 2))],
+            [distributor, f">{format_decimal((weight_cents - 1) / 100)}", '>0,00', format_decimal(rng.randint(3, 8)), format_decimal(rng.randint(2, 5))],
+        ]
+    return values
+
+def get_workloads(vv4, seeds, product_count, distributor_count):
+    for seed in range(seeds):
+        for generate in (generate_sheet_values, generate_boundary_sheet_values):
+            yield f"{generate.__name__} seed={seed}", vv4.parse_sheet_values(generate(product_count, distributor_count, seed))
+
+def check_vectorized_evaluator(vv4, seeds):
+    return all(
+        vv4.cross_check_vectorized_with_reference(extracted_data, conditions_data, sample_size=500, seed=seed)
+        for seed, (_, (extracted_data, conditions_data)) in enumerate(get_workloads(vv4, seeds, 10, 3))
+    )
+
+# MILP contro la forza bruta: i totali uguali a una soglia sono rari, servono molti cataloghi con soglie raggiungibili
+def check_milp(vv4, seeds):
+    workloads = list(get_workloads(vv4, seeds, 8, 3))
+    workloads += [(seed, vv4.parse_sheet_values(generate_boundary_sheet_values(7, 3, seed))) for seed in range(seeds, 8 * seeds)]
+    results = [vv4.cross_check_milp_with_brute_force(extracted_data, conditions_data) for _, (extracted_data, conditions_data) in workloads]
+    return all(results)
+
+# Codice Gray (vv_4.PY e PT.3) contro la forza bruta sequenziale: i totali vicini alle soglie devono cadere nella stessa fascia
+def check_gray_code(vv4, seeds):
+    pt3 = load_script('INTEGRAZIONE PT.3.PY')
+    failures = 0
+    for name, (extracted_data, conditions_data) in get_workloads(vv4, 3 * seeds, 7, 3):
+        _, reference_cost = vv4.find_optimal_combination_sequential(extracted_data, conditions_data)
+        _, gray_cost = vv4.find_optimal_combination_sharded(extracted_data, conditions_data, enumeration='gray')
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, pt3_cost = pt3.find_optimal_combination(extracted_data, conditions_data)
+        for engine, cost in (('vv_4.PY', gray_cost), ('PT.3', pt3_cost)):
+            if abs(cost - reference_cost) > 1e-6:
+                logging.error(f"Codice Gray {engine}, {name}: costo {cost} invece di {reference_cost}")
+                failures += 1
+    return not failures
+
+# Branch and bound di PT.9 contro la forza bruta sequenziale: la potatura non deve scartare l'ottimo vicino alle soglie
+def check_branch_and_bound(vv4, seeds):
+    pt9 = load_script('INTEGRAZIONE PT.9.PY')
+    failures = 0
+    for name, (extracted_data, conditions_data) in get_workloads(vv4, 3 * seeds, 7, 3):
+        _, reference_cost = vv4.find_optimal_combination_sequential(extracted_data, conditions_data)
+        with contextlib.redirect_stdout(io.StringIO()):
+            combination, cost = pt9.find_optimal_combination(vv4.build_product_index(extracted_data), conditions_data)
+        if abs(cost - reference_cost) > 1e-6 or abs(vv4.calculate_total_cost(combination, extracted_data, conditions_data) - cost) > 1e-6:
+            logging.error(f"Branch and bound PT.9, {name}: costo {cost} invece di {reference_cost}")
+            failures += 1
+    return not failures
+
+# Stato della ricerca locale (modalità anytime): dopo ogni spostamento il costo coincide (a meno degli arrotondamenti) con
+# quello di uno stato nuovo e con calculate_total_cost, e la ricerca locale partendo dall'ottimo non peggiora la soluzione
+def check_assignment_state(vv4, seeds):
+    failures = 0
+    for seed, (name, (extracted_data, conditions_data)) in enumerate(get_workloads(vv4, seeds, 7, 3)):
+        cost_model = vv4.compile_cost_model(extracted_data, conditions_data)
+        gray_code_tables = vv4.compile_gray_code_tables(cost_model)
+        product_options = gray_code_tables[0]
+        rng = random.Random(seed)
+
+        state = vv4.AssignmentState(gray_code_tables, [0] * len(product_options))
+        for _ in range(200):
+            p = rng.randrange(len(product_options))
+            state.move(p, rng.randrange(len(product_options[p])))
+            column = [options[k][0] for options, k in zip(product_options, state.choices)]
+            reference_cost = vv4.calculate_total_cost(vv4.decode_combination(column, cost_model), extracted_data, conditions_data)
+            if abs(state.total_cost - vv4.AssignmentState(gray_code_tables, state.choices).total_cost) > 1e-6 or abs(state.total_cost - reference_cost) > 1e-6:
+                logging.error(f"Stato della ricerca locale, {name}: costo {state.total_cost} invece di {reference_cost}")
+                failures += 1
+                break
+
+        optimal_combination, optimal_cost = vv4.find_optimal_combination_sequential(extracted_data, conditions_data)
+        optimal_column = vv4.encode_combinations([[(distributor, product_id) for distributor, product_ids in optimal_combination.items() for product_id in product_ids]], cost_model)[:, 0]
+        state.reset([[option[0] for option in options].index(d) for options, d in zip(product_options, optimal_column)])
+        vv4.improve_with_local_search(state, float('inf'))
+        if state.total_cost > optimal_cost + 1e-6:
+            logging.error(f"Ricerca locale, {name}: dall'ottimo {optimal_cost} a {state.total_cost}")
+            failures += 1
+    return not failures
+
+# Scrittura in 'COMBINAZIONE': prima scrittura, nessuna scrittura se il foglio è aggiornato, righe residue cancellate,
+# celle fuori dai blocchi invariate, confronto tra numeri e testo (non dipende dai cataloghi sintetici)
+def check_write_result_blocks(vv4, seeds):
+    start_row = vv4.RESULTS_START_ROW
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'foglio.json')
+        header = [['RISULTATI']] + [[] for _ in range(start_row - 2)]
+        previous_rows = [[f"VECCHIO{i}", 'DISTRIBUTORE X', 'nota'] + [''] * 8 + ['DISTRIBUTORE X', 1, 2, 3, 4, 5] for i in range(6)]
+        vv4.save_local_spreadsheet({'COMBINAZIONE': header + previous_rows}, path)
+        worksheet = vv4.LocalSpreadsheetSource(path).worksheet('COMBINAZIONE')
+
+        blocks = [('A', 'B', [['00123', 'DISTRIBUTORE 1'], ['PRD0002', 'DISTRIBUTORE 2']]), ('L', 'Q', [['DISTRIBUTORE 1', 1.5, 40, 48.8, 0, 2.0]])]
+        failures = []
+        if not vv4.write_result_blocks(worksheet, blocks):
+            failures.append("la prima scrittura non è avvenuta")
+        if vv4.write_result_blocks(worksheet, blocks):
+            failures.append("scrittura ripetuta con il foglio già aggiornato")
+
+        assignments = worksheet.batch_get([f"A{start_row}:B"])[0]
+        summary = worksheet.batch_get([f"L{start_row}:Q"])[0]
+        notes = worksheet.batch_get([f"C{start_row}:C"])[0]
+        if assignments != blocks[0][2]:
+            failures.append(f"assegnazioni scritte {assignments}")
+        if summary != blocks[1][2]:
+            failures.append(f"riepilogo scritto {summary}")
+        if len(notes) != len(previous_rows) or worksheet.batch_get(['A1'])[0] != [['RISULTATI']]:
+            failures.append("celle fuori dai blocchi modificate")
+
+        # Valori numerici riletti come interi o testo non forzano una nuova scrittura
+        vv4.save_local_spreadsheet({'COMBINAZIONE': header + [['00123', 'DISTRIBUTORE 1'] + [''] * 9 + ['DISTRIBUTORE 1', 1.5, 40.0, 48.8, 0.0, 2]]}, path)
+        if vv4.write_result_blocks(worksheet, [('A', 'B', blocks[0][2][:1]), blocks[1]]):
+            failures.append("scrittura con valori numerici equivalenti")
+
+    for failure in failures:
+        logging.error(f"Verifica scrittura risultati: {failure}")
+    return not failures
+
+CHECKS = {
+    'valutatore_vettoriale': check_vectorized_evaluator,
+    'milp': check_milp,
+    'codice_gray': check_gray_code,
+    'branch_and_bound': check_branch_and_bound,
+    'ricerca_locale': check_assignment_state,
+    'scrittura_risultati': check_write_result_blocks,
+}
+
+def run_check(name, check, vv4, seeds):
+    logging.disable(logging.INFO)
+    try:
+        # Barre di avanzamento dei motori nascoste: restano solo gli errori e l'esito
+        with contextlib.redirect_stderr(io.StringIO()):
+            passed = check(vv4, seeds)
+    finally:
+        logging.disable(logging.NOTSET)
+    logging.info(f"{name}: {'superata' if passed else 'FALLITA'}")
+    return passed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verifiche offline di vv_4.PY")
+    parser.add_argument('--checks', nargs='+', choices=list(CHECKS), default=list(CHECKS))
+    parser.add_argument('--seeds', type=int, default=10, help="Cataloghi sintetici per ogni tipo di verifica")
+    args = parser.parse_args()
+
+    vv4 = load_script('vv_4.PY')
+    results = [run_check(name, CHECKS[name], vv4, args.seeds) for name in args.checks]
+    sys.exit(0 if all(results) else 1)